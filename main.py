@@ -3,19 +3,29 @@ import sys
 import shutil
 import webbrowser
 import subprocess
+import threading
+import queue
 from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from xml.sax.saxutils import escape
+from difflib import SequenceMatcher
 import urllib.parse
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext, simpledialog
 import pandas as pd
-from PIL import Image, ImageTk
+import openpyxl
+from PIL import Image, ImageOps, ImageTk
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as ReportImage, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as ReportImage, PageBreak, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib import colors
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from io import BytesIO
 
 def resource_path(relative_path):
@@ -31,13 +41,77 @@ def resource_path(relative_path):
 
 # ========================= CONSTANTS =========================
 DATA_FILE = resource_path("patients.xlsx")
+CACHE_FILE = resource_path("patients.parquet")
 PHOTO_DIR = resource_path("photos")
+BG = '#f0f8ff'
+HEADER_BG = '#2c5aa0'
 PAGE_SIZE = 24
+TREE_INSERT_CHUNK = 8
+UI_POLL_MS = 100
+THUMB_CACHE_SIZE = 128
+PHOTO_MAX_SIZE = (600, 600)
+# PDF field table: labels get a fixed column, values the rest of the frame; a value wider than its column
+# (measured with stringWidth) becomes a wrapping Paragraph, the rest stay plain strings
+PDF_LABEL_WIDTH = 120
+PDF_FONT, PDF_FONT_SIZE, PDF_CELL_PADDING = 'Helvetica', 10, 12
+PDF_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (1, 0), (1, -1), PDF_FONT),
+    ('FONTSIZE', (0, 0), (-1, -1), PDF_FONT_SIZE),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.lightgrey),
+])
+# Near-duplicate detection: MinHash over character shingles, candidates confirmed by edit-distance ratio
+SHINGLE_SIZE = 8
+MINHASH_PERMS = 128
+MINHASH_THRESHOLD = 0.6
+FUZZY_MATCH_RATIO = 90
 DEFAULT_COLUMNS = [
     'SerialNo', 'PhotoPath', 'Name', 'Email', 'Gender', 'Age', 'Address',
     'PhoneNo', 'Occupation', 'AadharNo', 'Symptoms', 'Treatment',
     'StartDate', 'EndDate', 'Satisfied'
 ]
+SHARE_COLUMNS = ['SerialNo', 'Name', 'Email', 'PhoneNo']
+DTYPES = {
+    'SerialNo': str, 'AadharNo': str, 'PhoneNo': str, 'Name': str, 'Email': str,
+    'Gender': 'category', 'Satisfied': 'category'
+}
+# Parsed shadow columns kept next to the raw columns so sorting and stats never re-parse them
+SORT_KEYS = {'SerialNo': '_SerialNoNum', 'Age': '_AgeNum', 'StartDate': '_StartDateDT', 'EndDate': '_EndDateDT'}
+DATE_COLUMNS = ['StartDate', 'EndDate']
+
+# Prefer the Rust-based calamine reader (pandas >= 2.2 with python-calamine installed)
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = 'calamine' if tuple(int(p) for p in pd.__version__.split('.')[:2]) >= (2, 2) else None
+except ImportError:
+    EXCEL_ENGINE = None
+
+# xlsxwriter writes workbooks several times faster than openpyxl; openpyxl is still used for appends
+try:
+    import xlsxwriter  # noqa: F401
+    EXCEL_WRITER = 'xlsxwriter'
+except ImportError:
+    EXCEL_WRITER = None
+
+# The Parquet load cache needs pyarrow; without it every start reads the workbook
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+# Fuzzy duplicate matching is only available with datasketch installed
+try:
+    from datasketch import MinHash, MinHashLSH
+except ImportError:
+    MinHashLSH = None
+
+try:
+    from rapidfuzz.fuzz import ratio as fuzz_ratio
+except ImportError:
+    def fuzz_ratio(a, b):
+        return SequenceMatcher(None, a, b).ratio() * 100
 
 
 # ========================= HELPER FUNCTIONS =========================
@@ -45,26 +119,159 @@ def ensure_datafile():
     if not os.path.exists(DATA_FILE):
         os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
         df = pd.DataFrame(columns=DEFAULT_COLUMNS)
-        df.to_excel(DATA_FILE, index=False)
+        df.to_excel(DATA_FILE, index=False, engine=EXCEL_WRITER)
+
+def data_file_stamp():
+    # mtime alone is not enough: a restored backup (shutil.copy2) keeps its old mtime
+    st = os.stat(DATA_FILE)
+    return f"{st.st_mtime_ns}:{st.st_size}".encode()
+
+def read_cache():
+    # The Parquet sidecar is only trusted while it was written for exactly this patients.xlsx, which may be
+    # edited by hand or restored from a backup
+    try:
+        if pq.read_schema(CACHE_FILE).metadata.get(b'patients_xlsx') == data_file_stamp():
+            return pd.read_parquet(CACHE_FILE)
+    except Exception:
+        pass
+    return None
+
+def write_cache(df):
+    # Call right after writing patients.xlsx. Best effort: without pyarrow (or with mixed-type columns)
+    # the next start simply reads the workbook
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**table.schema.metadata, b'patients_xlsx': data_file_stamp()})
+        pq.write_table(table, CACHE_FILE, compression='zstd')
+    except Exception:
+        pass
+
+def is_valid_date(value):
+    return not value or pd.notna(pd.to_datetime(value, errors='coerce'))
+
+def restore_categories(df):
+    # concat and row enlargement turn categorical columns back into plain strings
+    for c, t in DTYPES.items():
+        if t == 'category' and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype('category')
+    return df
+
+def add_categories(df, values):
+    # Categorical columns reject unseen values on assignment, so register them first
+    for c, v in values.items():
+        if isinstance(df[c].dtype, pd.CategoricalDtype) and v not in df[c].cat.categories:
+            df[c] = df[c].cat.add_categories([v])
+
+def parse_sort_key(col, value):
+    # Works on a whole column or a single cell
+    if col in DATE_COLUMNS: return pd.to_datetime(value, errors='coerce')
+    value = pd.to_numeric(value, errors='coerce')
+    return value.astype(float) if isinstance(value, pd.Series) else value
+
+def add_sort_keys(df):
+    for col, key in SORT_KEYS.items():
+        df[key] = parse_sort_key(col, df[col])
+    return df
+
+def save_photo(src, serial):
+    # Store uploads downscaled as JPEG; full-resolution PNGs slow every detail view and PDF export
+    dest = os.path.join(PHOTO_DIR, f"patient_{serial}.jpg")
+    with Image.open(src) as img:
+        # Opening only reads the header: a JPEG that already fits and carries no EXIF (orientation, GPS,
+        # device data) is copied byte for byte, no decode; anything with EXIF is re-encoded to strip it
+        if img.format == 'JPEG' and img.width <= PHOTO_MAX_SIZE[0] and img.height <= PHOTO_MAX_SIZE[1] and not img.info.get('exif'):
+            if os.path.abspath(src) != os.path.abspath(dest): shutil.copyfile(src, dest)
+            return dest
+        img = ImageOps.exif_transpose(img)  # bake in the orientation before the EXIF data is dropped
+        img.thumbnail(PHOTO_MAX_SIZE, Image.LANCZOS)
+        img.convert('RGB').save(dest, format='JPEG', quality=85, optimize=True, progressive=True)
+    return dest
+
+def contains_any(lowered, needle):
+    # Rows where any column of an already-lowercased frame contains needle, one vectorized scan per column
+    mask = pd.Series(False, index=lowered.index)
+    for c in lowered.columns: mask |= lowered[c].str.contains(needle, regex=False, na=False)
+    return mask
+
+def table_rows(df, cols):
+    # The given columns as plain row lists for a Treeview, blanks instead of NaN/NaT, in one conversion
+    return df[cols].to_numpy(dtype=object, na_value='').tolist()
+
+def coerce_to_dtypes(values):
+    # Cast form strings by column name rather than by the frame's current dtype: a column that is
+    # still entirely blank loads as float64, and numeric parsing would turn a valid date into NaN
+    out = {}
+    for c, v in values.items():
+        if c in DATE_COLUMNS: v = pd.to_datetime(v, errors='coerce')
+        elif c == 'Age':
+            v = pd.to_numeric(v, errors='coerce')
+            if is_whole_number(v): v = int(v)
+        out[c] = v
+    return out
+
+def is_whole_number(value):
+    # Accepts "38" as well as "38.0", which is how Age shows once the column holds a blank
+    value = pd.to_numeric(value, errors='coerce')
+    return pd.notna(value) and float(value).is_integer()
+
+def duplicate_keys(df, columns):
+    # One canonical (stripped, lowercased) identity string per row, shared by the exact and fuzzy passes
+    cells = df[columns].astype(object)
+    cells = cells.where(cells.notna(), '').astype(str)
+    keys = cells[columns[0]].str.strip()
+    for c in columns[1:]: keys = keys + '|' + cells[c].str.strip()
+    return keys.str.lower()
+
+def find_exact_duplicates(keys):
+    # Returns (labels whose key occurs more than once, first label of each distinct key); the key strings
+    # are hashed to uint64 once so counting and first-seen checks compare integers instead of strings
+    hashes = pd.util.hash_pandas_object(keys, index=False)
+    counts = hashes.value_counts()
+    return set(keys.index[hashes.isin(counts.index[counts > 1])]), keys.index[~hashes.duplicated()]
+
+def find_fuzzy_duplicates(keys):
+    # Returns the labels of rows whose key has a near-identical partner
+    if MinHashLSH is None or keys.empty: return set()
+    lsh = MinHashLSH(threshold=MINHASH_THRESHOLD, num_perm=MINHASH_PERMS)
+    signatures = {}
+    for label, text in keys.items():
+        m = MinHash(num_perm=MINHASH_PERMS)
+        m.update_batch([text[i:i + SHINGLE_SIZE].encode('utf8') for i in range(max(1, len(text) - SHINGLE_SIZE + 1))])
+        lsh.insert(label, m)
+        signatures[label] = m
+    matched = set()
+    for label, m in signatures.items():
+        for other in lsh.query(m):
+            if other != label and fuzz_ratio(keys[label], keys[other]) >= FUZZY_MATCH_RATIO:
+                matched.update((label, other))
+    return matched
 
 def get_most_common(df, column):
     if df.empty or column not in df.columns:
         return 'N/A'
-    counts = df[column].astype(str).value_counts()
-    return counts.index[0] if not counts.empty else 'N/A'
+    # Series.mode counts on the category codes directly for categorical columns, no string cast needed
+    modes = df[column].mode(dropna=True)
+    return modes.iloc[0] if not modes.empty else 'N/A'
 
 def get_average_duration(df):
     if df.empty or 'StartDate' not in df.columns or 'EndDate' not in df.columns:
         return 'N/A'
     try:
-        start_dates = pd.to_datetime(df['StartDate'], errors='coerce')
-        end_dates = pd.to_datetime(df['EndDate'], errors='coerce')
+        # Use the dates parsed once at load when available
+        start_dates = df['_StartDateDT'] if '_StartDateDT' in df.columns else pd.to_datetime(df['StartDate'], errors='coerce')
+        end_dates = df['_EndDateDT'] if '_EndDateDT' in df.columns else pd.to_datetime(df['EndDate'], errors='coerce')
         valid_durations = (end_dates - start_dates).dt.days
         mean_duration = valid_durations.mean()
         return f"{mean_duration:.1f} days" if pd.notna(mean_duration) else 'N/A'
     except Exception:
         return 'N/A'
 
+def summary_stats(df):
+    # (total, males, females, others, average age, most common symptom, average duration) for the stats windows
+    total, genders = len(df), df['Gender'].value_counts()
+    males, females = int(genders.get('Male', 0)), int(genders.get('Female', 0))
+    return total, males, females, total - males - females, df['_AgeNum'].mean(), get_most_common(df, 'Symptoms'), get_average_duration(df)
+
 def responsive_pack(widget, **kwargs):
     kwargs.setdefault('padx', 10)
     kwargs.setdefault('pady', 10)
@@ -76,48 +283,230 @@ class PatientManagementSystem(tk.Tk):
         super().__init__()
         self.title("Navjeevan Arogya Sanstha - Patient Management System")
         self.geometry("1000x700")
-        self.configure(bg='#f0f8ff')
+        self.configure(bg=BG)
         ensure_datafile()
+        os.makedirs(PHOTO_DIR, exist_ok=True)
         self.patients_df = self.load_patients()
+        self._search_blob = None
+        self._search_lower = None
+        self._serial_index = None
+        self._filter_cache = {}
+        self._df_version = 0
+        self._thumb_cache = OrderedDict()
+        self._fuzzy_dup_cache = (None, set())
+        self._stats_cache = (None, None)
+        self._dup_page_version = None
+        self._refresh_photo_index()
+        # Workbook writes go through one worker so they land in order; exports get their own pool
+        self._save_pool = ThreadPoolExecutor(max_workers=1)
+        self._io_pool = ThreadPoolExecutor(max_workers=2)
+        self._save_lock = threading.Lock()
+        self._pending_save = None
+        self._ui_queue = queue.Queue()
         self.current_frame = None
+        self._frames = {}
         self.show_main_menu()
+        self._poll_ui_queue()
 
     def load_patients(self):
         try:
-            df = pd.read_excel(DATA_FILE, dtype={'SerialNo': str, 'AadharNo': str, 'PhoneNo': str})
-            for c in DEFAULT_COLUMNS:
-                if c not in df.columns:
-                    df[c] = ''
-            return df[DEFAULT_COLUMNS]
+            df = read_cache()
+            if df is None: df = pd.read_excel(DATA_FILE, engine=EXCEL_ENGINE, usecols=lambda c: c in DEFAULT_COLUMNS, dtype=DTYPES)
+            df = df.reindex(columns=DEFAULT_COLUMNS, fill_value='')
+            # Dates may load as text (workbooks written before dates were typed) or as float64 NaN when blank;
+            # always make them datetime64 so edits can assign Timestamps
+            for c in DATE_COLUMNS:
+                df[c] = pd.to_datetime(df[c], errors='coerce', format='mixed').astype('datetime64[ns]')
+            return add_sort_keys(restore_categories(df))
         except Exception:
-            return pd.DataFrame(columns=DEFAULT_COLUMNS)
+            return add_sort_keys(restore_categories(pd.DataFrame(columns=DEFAULT_COLUMNS)))
+
+    def _invalidate_caches(self):
+        # Call after any change to self.patients_df
+        self._df_version += 1
+        self._search_blob = None
+        self._search_lower = None
+        self._serial_index = None
+        self._filter_cache.clear()
+
+    def _get_search_blob(self):
+        # One lowercased string per patient so a search is a single vectorized substring scan
+        if self._search_blob is None:
+            cells = self.patients_df[DEFAULT_COLUMNS].astype(object)
+            cells = cells.where(cells.notna(), '').astype(str)
+            blob = cells[DEFAULT_COLUMNS[0]]
+            for c in DEFAULT_COLUMNS[1:]: blob = blob + '\n' + cells[c]
+            self._search_blob = blob.str.lower()
+        return self._search_blob
+
+    def _get_serial_index(self):
+        # SerialNo -> row label; iterated backwards so the first row wins when serials are duplicated
+        if self._serial_index is None:
+            df = self.patients_df
+            self._serial_index = dict(zip(df['SerialNo'].iloc[::-1], df.index[::-1]))
+        return self._serial_index
+
+    def _get_search_lower(self):
+        # Lowercased copies of the share page's search columns, built once per data version
+        if self._search_lower is None:
+            self._search_lower = pd.DataFrame({c: self.patients_df[c].astype(str).str.lower() for c in SHARE_COLUMNS})
+        return self._search_lower
 
     def save_patients(self):
+        # Writes a snapshot in the background; a save queued behind a running one just replaces its snapshot
+        self._invalidate_caches()
+        with self._save_lock:
+            queued = self._pending_save is not None
+            self._pending_save = self.patients_df[DEFAULT_COLUMNS]
+        if not queued: self._save_pool.submit(self._write_pending_save)
+
+    def _write_pending_save(self):
+        with self._save_lock:
+            df, self._pending_save = self._pending_save, None
         try:
-            self.patients_df.to_excel(DATA_FILE, index=False)
-            self.patients_df = self.load_patients() # Reload to maintain data type consistency
+            df.to_excel(DATA_FILE, index=False, engine=EXCEL_WRITER)
+            write_cache(df)
         except Exception as e:
-            messagebox.showerror("Error", f"Could not save patients.xlsx: {e}")
+            self._report_save_error(e)
+
+    def _report_save_error(self, e):
+        # Called on a worker thread: only queue the message, the Tk thread shows it
+        msg = f"Could not save patients.xlsx: {e}"
+        self._ui_queue.put(lambda: messagebox.showerror("Error", msg))
+
+    def _poll_ui_queue(self):
+        # Worker threads never call Tk; they queue callables that run here on the Tk thread
+        try: self._run_ui_queue()
+        finally: self.after(UI_POLL_MS, self._poll_ui_queue)
+
+    def _run_ui_queue(self):
+        # A failing callback (e.g. its page was destroyed meanwhile) is reported like any Tk callback error
+        # and must not stop the ones queued behind it
+        while True:
+            try: fn = self._ui_queue.get_nowait()
+            except queue.Empty: return
+            try: fn()
+            except Exception: self.report_callback_exception(*sys.exc_info())
+
+    def _wait_for_saves(self):
+        # The save worker runs jobs in order, so once this no-op has run every earlier write is on disk;
+        # any errors it queued are shown right away
+        self._save_pool.submit(lambda: None).result()
+        self._run_ui_queue()
+
+    def _run_in_background(self, job, on_done, text="Exporting..."):
+        # Runs job on the I/O pool behind an indeterminate progress bar; on_done runs back on the Tk thread
+        win = tk.Toplevel(self)
+        win.title("Please wait")
+        win.configure(bg=BG)
+        win.transient(self)
+        tk.Label(win, text=text, font=("Arial", 11), bg=BG).pack(padx=20, pady=(12, 6))
+        bar = ttk.Progressbar(win, mode='indeterminate', length=220)
+        bar.pack(padx=20, pady=(0, 12))
+        bar.start(10)
+
+        def finish(future):
+            win.destroy()
+            if future.exception(): messagebox.showerror("Error", f"Could not export: {future.exception()}")
+            else: on_done()
+        self._io_pool.submit(job).add_done_callback(lambda f: self._ui_queue.put(lambda: finish(f)))
+
+    def destroy(self):
+        self._wait_for_saves()
+        self._save_pool.shutdown()
+        self._io_pool.shutdown(wait=False)
+        super().destroy()
+
+    def _next_serial(self):
+        serials = self.patients_df['_SerialNoNum']
+        return int(serials.max()) + 1 if serials.notna().any() else 1
+
+    def _update_sort_keys(self, idx):
+        for col, key in SORT_KEYS.items():
+            self.patients_df.at[idx, key] = parse_sort_key(col, self.patients_df.at[idx, col])
+
+    def _refresh_photo_index(self):
+        # Call after adding or removing a file in PHOTO_DIR, which __init__ creates
+        self._photo_files = set(os.listdir(PHOTO_DIR))
+
+    def _photo_exists(self, path):
+        # Photos stored in PHOTO_DIR are checked against the cached listing instead of a stat per lookup
+        if not path or pd.isna(path): return False
+        path = str(path)
+        if os.path.dirname(os.path.abspath(path)) == os.path.abspath(PHOTO_DIR):
+            return os.path.basename(path) in self._photo_files
+        return os.path.exists(path)
+
+    def _get_thumbnail(self, path):
+        # LRU cache of detail-view thumbnails keyed by (path, mtime) so reopening a record skips the decode
+        key = (path, os.path.getmtime(path))
+        photo = self._thumb_cache.get(key)
+        if photo is not None:
+            self._thumb_cache.move_to_end(key)
+            return photo
+        with Image.open(path) as img:
+            img.thumbnail((200, 200))
+            photo = ImageTk.PhotoImage(img)
+        self._thumb_cache[key] = photo
+        if len(self._thumb_cache) > THUMB_CACHE_SIZE: self._thumb_cache.popitem(last=False)
+        return photo
+
+    def append_patient(self, patient):
+        # openpyxl fallback: append one row instead of re-serializing the DataFrame with openpyxl. With
+        # xlsxwriter a full rewrite is faster than openpyxl loading and re-saving the workbook
+        with self._save_lock:
+            queued = self._pending_save is not None
+        # A queued full save would write the row as well, so appending too would duplicate it
+        if queued or EXCEL_WRITER: return self.save_patients()
+        self._save_pool.submit(self._write_appended_row, patient, self.patients_df[DEFAULT_COLUMNS])
+
+    def _write_appended_row(self, patient, df):
+        try:
+            wb = openpyxl.load_workbook(DATA_FILE)
+            ws = wb.active
+            header = [c.value for c in ws[1]]
+            ws.append([None if pd.isna(patient.get(h)) or patient.get(h) == '' else patient.get(h) for h in header])
+            wb.save(DATA_FILE)
+            write_cache(df)
+        except Exception as e:
+            self._report_save_error(e)
 
     def clear_frame(self):
+        # Pages registered in self._frames are only hidden so they can be shown again without rebuilding
         if self.current_frame:
-            self.current_frame.destroy()
+            if any(self.current_frame is f for f, _, _ in self._frames.values()): self.current_frame.pack_forget()
+            else: self.current_frame.destroy()
             self.current_frame = None
 
+    def _register_frame(self, name, frame, activate):
+        self._frames[name] = (frame, activate, frame.pack_info())
+        activate()
+
+    def _show_cached(self, name):
+        if name not in self._frames: return False
+        frame, activate, pack_opts = self._frames[name]
+        if self.current_frame is not frame:
+            self.clear_frame()
+            frame.pack(**pack_opts)
+            self.current_frame = frame
+        activate()
+        return True
+
     def show_main_menu(self):
+        if self._show_cached('main'): return
         self.clear_frame()
-        frame = tk.Frame(self, bg='#f0f8ff')
+        frame = tk.Frame(self, bg=BG)
         frame.pack(fill='both', expand=True, padx=20, pady=20)
         self.current_frame = frame
 
-        header_frame = tk.Frame(frame, bg='#2c5aa0')
+        header_frame = tk.Frame(frame, bg=HEADER_BG)
         header_frame.pack(fill='x', pady=(0, 20))
         tk.Label(header_frame, text="Navjeevan Arogya Sanstha", font=("Arial", 28, "bold"),
-                 fg='white', bg='#2c5aa0').pack(pady=20)
+                 fg='white', bg=HEADER_BG).pack(pady=20)
         tk.Label(header_frame, text="Patient Management System", font=("Arial", 14),
-                 fg='white', bg='#2c5aa0').pack(pady=(0, 12))
+                 fg='white', bg=HEADER_BG).pack(pady=(0, 12))
 
-        button_frame = tk.Frame(frame, bg='#f0f8ff')
+        button_frame = tk.Frame(frame, bg=BG)
         button_frame.pack(expand=True)
 
         buttons = [
@@ -138,32 +527,30 @@ class PatientManagementSystem(tk.Tk):
             btn.grid(row=i // 2, column=i % 2, padx=20, pady=10)
             btn.bind("<Enter>", lambda e, b=btn: b.config(bg='#3a5a8a'))
             btn.bind("<Leave>", lambda e, b=btn: b.config(bg='#4c72b0'))
+        self._register_frame('main', frame, lambda: None)
 
     def show_new_patient(self):
+        if self._show_cached('new'): return
         self.clear_frame()
-        frame = tk.Frame(self, bg='#f0f8ff')
+        frame = tk.Frame(self, bg=BG)
         frame.pack(fill='both', expand=True, padx=20, pady=20)
         self.current_frame = frame
 
-        header = tk.Frame(frame, bg='#2c5aa0')
+        header = tk.Frame(frame, bg=HEADER_BG)
         header.pack(fill='x', pady=(0, 10))
         tk.Label(header, text="New Patient Registration", font=("Arial", 18, "bold"),
-                 fg='white', bg='#2c5aa0').pack(pady=10)
+                 fg='white', bg=HEADER_BG).pack(pady=10)
 
-        canvas = tk.Canvas(frame, bg='#f0f8ff', highlightthickness=0)
+        canvas = tk.Canvas(frame, bg=BG, highlightthickness=0)
         scrollbar = ttk.Scrollbar(frame, orient="vertical", command=canvas.yview)
-        scrollable = tk.Frame(canvas, bg='#f0f8ff')
+        scrollable = tk.Frame(canvas, bg=BG)
         scrollable.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
         canvas.create_window((0, 0), window=scrollable, anchor='nw')
         canvas.configure(yscrollcommand=scrollbar.set)
         canvas.pack(side='left', fill='both', expand=True)
         scrollbar.pack(side='right', fill='y')
 
-        try:
-            numeric_serials = pd.to_numeric(self.patients_df['SerialNo'], errors='coerce')
-            next_serial = int(numeric_serials.max()) + 1 if not numeric_serials.dropna().empty else 1
-        except Exception:
-            next_serial = 1
+        next_serial = self._next_serial()
 
         fields = [
             ("Serial No:", 'serial', 'entry', str(next_serial)),
@@ -187,9 +574,9 @@ class PatientManagementSystem(tk.Tk):
         self.new_photo = None
 
         for label, key, typ, default in fields:
-            row = tk.Frame(scrollable, bg='#f0f8ff')
+            row = tk.Frame(scrollable, bg=BG)
             row.pack(fill='x', pady=6)
-            tk.Label(row, text=label, width=28, anchor='w', bg='#f0f8ff').pack(side='left', padx=(0, 10))
+            tk.Label(row, text=label, width=28, anchor='w', bg=BG).pack(side='left', padx=(0, 10))
 
             if typ == 'entry':
                 var = tk.StringVar(value=default)
@@ -206,11 +593,12 @@ class PatientManagementSystem(tk.Tk):
             elif typ == 'button':
                 tk.Button(row, text="Add Photo", bg='#4c72b0', fg='white', command=self._new_add_photo).pack(side='left')
 
-        btns = tk.Frame(frame, bg='#f0f8ff')
+        btns = tk.Frame(frame, bg=BG)
         btns.pack(fill='x', pady=10)
         tk.Button(btns, text="Submit", bg='#28a745', fg='white', width=12, command=self._new_submit).pack(side='left', padx=6, expand=True)
         tk.Button(btns, text="Clear", bg='#ffc107', width=12, command=self._new_clear).pack(side='left', padx=6, expand=True)
         tk.Button(btns, text="Back", bg='#6c757d', fg='white', width=12, command=self.show_main_menu).pack(side='left', padx=6, expand=True)
+        self._register_frame('new', frame, self._new_clear)
 
     def _new_add_photo(self):
         path = filedialog.askopenfilename(title="Select Photo", filetypes=[("Image", "*.jpg *.jpeg *.png *.bmp")])
@@ -236,10 +624,13 @@ class PatientManagementSystem(tk.Tk):
         except ValueError:
             messagebox.showerror("Error", "Age must be a numeric value.")
             return
+        if not (is_valid_date(self.new_vars['start_date'].get().strip()) and is_valid_date(self.new_vars['end_date'].get().strip())):
+            messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format.")
+            return
 
         try:
             serial = int(self.new_vars['serial'].get())
-            if str(serial) in self.patients_df['SerialNo'].values:
+            if str(serial) in self._get_serial_index():
                 messagebox.showerror("Error", f"Serial number {serial} already exists.")
                 return
         except ValueError:
@@ -247,7 +638,7 @@ class PatientManagementSystem(tk.Tk):
             return
 
         new_patient = {
-            'SerialNo': serial, 'PhotoPath': '', 'Name': self.new_vars['name'].get().strip(),
+            'SerialNo': str(serial), 'PhotoPath': '', 'Name': self.new_vars['name'].get().strip(),
             'Email': self.new_vars['email'].get().strip(), 'Gender': self.new_vars['gender'].get(),
             'Age': int(self.new_vars['age'].get()), 'Address': self.new_vars['address'].get().strip(),
             'PhoneNo': self.new_vars['phone'].get().strip(), 'Occupation': self.new_vars['occupation'].get().strip(),
@@ -257,29 +648,32 @@ class PatientManagementSystem(tk.Tk):
             'StartDate': self.new_vars['start_date'].get(), 'EndDate': self.new_vars['end_date'].get(),
             'Satisfied': self.new_vars['satisfied'].get()
         }
+        new_patient.update(coerce_to_dtypes({c: new_patient[c] for c in DATE_COLUMNS}))
 
         if self.new_photo:
-            os.makedirs(PHOTO_DIR, exist_ok=True)
-            fname = f"patient_{serial}.png"
-            dest = os.path.join(PHOTO_DIR, fname)
             try:
-                img = Image.open(self.new_photo)
-                img.save(dest, format='PNG')
+                dest = save_photo(self.new_photo, serial)
                 new_patient['PhotoPath'] = dest
+                self._refresh_photo_index()
+                self._get_thumbnail(dest)
             except Exception as e:
                 messagebox.showwarning("Photo", f"Could not copy photo: {e}")
 
-        self.patients_df = pd.concat([self.patients_df, pd.DataFrame([new_patient])], ignore_index=True)
-        self.save_patients()
+        # Assign the row in place rather than concatenating a one-row frame onto a copy of the whole table
+        new_row = dict(new_patient)
+        new_row.update({key: parse_sort_key(col, new_patient[col]) for col, key in SORT_KEYS.items()})
+        # numpy datetime64 scalars (NaT included) keep the date columns datetime64 when the frame grows
+        for col in DATE_COLUMNS + [SORT_KEYS[c] for c in DATE_COLUMNS]: new_row[col] = pd.Timestamp(new_row[col]).to_datetime64()
+        label = self.patients_df.index.max() + 1 if len(self.patients_df) else 0
+        self.patients_df.loc[label] = new_row
+        restore_categories(self.patients_df)
+        self._invalidate_caches()
+        self.append_patient(new_patient)
         messagebox.showinfo("Success", "Patient registered")
         self._new_clear()
 
     def _new_clear(self):
-        try:
-            numeric_serials = pd.to_numeric(self.patients_df['SerialNo'], errors='coerce')
-            next_serial = int(numeric_serials.max()) + 1 if not numeric_serials.dropna().empty else 1
-        except Exception:
-            next_serial = 1
+        next_serial = self._next_serial()
         for k, v in self.new_vars.items():
             if isinstance(v, tk.StringVar): v.set('')
             elif isinstance(v, scrolledtext.ScrolledText): v.delete("1.0", "end")
@@ -288,36 +682,37 @@ class PatientManagementSystem(tk.Tk):
         self.new_photo = None
 
     def show_view_records(self):
+        if self._show_cached('view'): return
         self.clear_frame()
-        frame = tk.Frame(self, bg='#f0f8ff')
+        frame = tk.Frame(self, bg=BG)
         frame.pack(fill='both', expand=True, padx=12, pady=12)
         self.current_frame = frame
 
-        header = tk.Frame(frame, bg='#2c5aa0')
+        header = tk.Frame(frame, bg=HEADER_BG)
         header.pack(fill='x', pady=(0, 8))
-        tk.Label(header, text="All Patient Records", font=("Arial", 18, "bold"), fg='white', bg='#2c5aa0').pack(pady=8)
+        tk.Label(header, text="All Patient Records", font=("Arial", 18, "bold"), fg='white', bg=HEADER_BG).pack(pady=8)
 
-        filter_frame = tk.Frame(frame, bg='#f0f8ff')
+        filter_frame = tk.Frame(frame, bg=BG)
         filter_frame.pack(fill='x', pady=6)
         
-        tk.Label(filter_frame, text="Search:", bg='#f0f8ff').pack(side='left', padx=6)
+        tk.Label(filter_frame, text="Search:", bg=BG).pack(side='left', padx=6)
         self.search_var = tk.StringVar()
         search_entry = tk.Entry(filter_frame, textvariable=self.search_var, width=30)
         search_entry.pack(side='left')
         
-        tk.Label(filter_frame, text="Gender Filter:", bg='#f0f8ff').pack(side='left', padx=(20, 6))
+        tk.Label(filter_frame, text="Gender Filter:", bg=BG).pack(side='left', padx=(20, 6))
         self.gender_filter_var = tk.StringVar(value="All")
-        gender_options = ["All"] + list(self.patients_df['Gender'].dropna().unique())
+        gender_options = ["All"] + list(self.patients_df['Gender'].cat.categories)
         gender_combo = ttk.Combobox(filter_frame, textvariable=self.gender_filter_var, values=gender_options, state='readonly')
         gender_combo.pack(side='left')
         
-        tk.Label(filter_frame, text="Sort By:", bg='#f0f8ff').pack(side='left', padx=(20, 6))
+        tk.Label(filter_frame, text="Sort By:", bg=BG).pack(side='left', padx=(20, 6))
         self.sort_by_var = tk.StringVar(value="SerialNo")
         sort_options = ['SerialNo', 'Name', 'Age', 'StartDate', 'EndDate']
         sort_combo = ttk.Combobox(filter_frame, textvariable=self.sort_by_var, values=sort_options, state='readonly')
         sort_combo.pack(side='left')
 
-        action_frame = tk.Frame(frame, bg='#f0f8ff')
+        action_frame = tk.Frame(frame, bg=BG)
         action_frame.pack(fill='x', pady=5)
         
         cols = DEFAULT_COLUMNS.copy()
@@ -329,9 +724,9 @@ class PatientManagementSystem(tk.Tk):
         tree.bind('<Double-1>', lambda e: self._open_detail_from_tree(tree))
 
         self.current_page = {'i': 0}
-        nav = tk.Frame(frame, bg='#f0f8ff')
+        nav = tk.Frame(frame, bg=BG)
         nav.pack(fill='x')
-        page_label = tk.Label(nav, text="Page 1", bg='#f0f8ff')
+        page_label = tk.Label(nav, text="Page 1", bg=BG)
 
         def refresh_view():
             self.search_var.set("")
@@ -362,70 +757,117 @@ class PatientManagementSystem(tk.Tk):
         tk.Button(nav, text="<< Prev", command=prev_page).pack(side='left', padx=4)
         tk.Button(nav, text="Next >>", command=next_page).pack(side='left', padx=4)
         page_label.pack(side='left', padx=6)
-        self._view_refresh(tree=tree, page_label=page_label)
+
+        state = (self.search_var, self.gender_filter_var, self.sort_by_var, self.current_page)
+        def activate():
+            self.search_var, self.gender_filter_var, self.sort_by_var, self.current_page = state
+            gender_combo['values'] = ["All"] + list(self.patients_df['Gender'].cat.categories)
+            self._view_refresh(tree=tree, page_label=page_label)
+        self._register_frame('view', frame, activate)
+
+    def _memo_filter(self, name, key, build):
+        # One memoized result per page, reused while its filter settings and the data version are unchanged
+        key = key + (self._df_version,)
+        cached = self._filter_cache.get(name)
+        if cached is None or cached[0] != key: self._filter_cache[name] = cached = (key, build())
+        return cached[1]
 
     def _get_filtered_df(self):
-        df = self.patients_df.copy()
+        # Memoized per filter settings so paging is just an iloc slice; cleared by _invalidate_caches
+        return self._memo_filter('view', (self.search_var.get(), self.gender_filter_var.get(), self.sort_by_var.get()), self._build_filtered_df)
+
+    def _build_filtered_df(self):
+        df = self.patients_df
         s = (self.search_var.get() or "").strip().lower()
-        if s: df = df[df.apply(lambda r: any(s in str(cell).lower() for cell in r), axis=1)]
+        if s: df = df[self._get_search_blob().str.contains(s, regex=False, na=False)]
         gender_filter = self.gender_filter_var.get()
-        if gender_filter != "All": df = df[df['Gender'] == gender_filter]
+        if gender_filter != "All":
+            # Compare the int8 category codes rather than the strings
+            categories = df['Gender'].cat.categories
+            df = df[df['Gender'].cat.codes == categories.get_loc(gender_filter)] if gender_filter in categories else df.iloc[0:0]
         sort_by = self.sort_by_var.get()
         if sort_by in df.columns:
-            try:
-                if sort_by in ['SerialNo', 'Age']: df[sort_by] = pd.to_numeric(df[sort_by], errors='coerce')
-                df = df.sort_values(by=sort_by, na_position='last')
+            try: df = df.sort_values(by=SORT_KEYS.get(sort_by, sort_by), na_position='last')
             except Exception: pass
-        return df.reset_index(drop=True)
+        return df
 
     def _view_refresh(self, tree, page_label):
         if tree is None: return
-        for it in tree.get_children(): tree.delete(it)
+        tree.delete(*tree.get_children())
         df = self._get_filtered_df()
         total_pages = max(1, (len(df) + PAGE_SIZE - 1) // PAGE_SIZE)
         if self.current_page['i'] >= total_pages: self.current_page['i'] = 0
         start = self.current_page['i'] * PAGE_SIZE
-        for _, r in df.iloc[start:start + PAGE_SIZE].iterrows():
-            vals = [r.get(c, '') for c in DEFAULT_COLUMNS]
-            tree.insert('', 'end', values=vals)
+        self._fill_tree(tree, table_rows(df.iloc[start:start + PAGE_SIZE], DEFAULT_COLUMNS))
         if page_label is not None: page_label.config(text=f"Page {self.current_page['i'] + 1} / {total_pages} (Total: {len(df)})")
 
+    def _fill_tree(self, tree, rows):
+        # Insert in small batches via after_idle so Tk repaints in between; a newer fill cancels a pending one
+        # tree.row_values keeps each item's source row so handlers never read values back through Tk
+        token = object()
+        tree.fill_token = token
+        tree.row_values = {}
+        def flush(i):
+            if tree.fill_token is not token: return
+            for vals in rows[i:i + TREE_INSERT_CHUNK]: tree.row_values[tree.insert('', 'end', values=vals)] = vals
+            if i + TREE_INSERT_CHUNK < len(rows): self.after_idle(flush, i + TREE_INSERT_CHUNK)
+        flush(0)
+
+    def _fill_pool(self, tree, rows):
+        # Checkbox pages keep PAGE_SIZE items alive and rewrite their values; unused slots are detached
+        for i, iid in enumerate(tree.row_pool):
+            if i < len(rows):
+                tree.item(iid, values=rows[i])
+                tree.move(iid, '', i)
+            else: tree.detach(iid)
+        return tree.row_pool[:len(rows)]
+
+    def _fill_checkbox_page(self, tree, page_label, df, cols):
+        # Shows the current page of df unchecked; returns {iid: row label} for the rows on screen
+        total = max(1, (len(df) + PAGE_SIZE - 1) // PAGE_SIZE)
+        if self.current_page['i'] >= total: self.current_page['i'] = 0
+        start = self.current_page['i'] * PAGE_SIZE
+        page = df.iloc[start:start + PAGE_SIZE]
+        iids = self._fill_pool(tree, [['☐'] + row for row in table_rows(page, cols)])
+        self.checkbox_state.clear()
+        self.checkbox_state.update(dict.fromkeys(iids, False))
+        tree.row_serials = dict(zip(iids, page['SerialNo']))
+        if page_label: page_label.config(text=f"Page {self.current_page['i'] + 1} / {total} (Total: {len(df)})")
+        return dict(zip(iids, page.index))
+
     def _open_detail_from_tree(self, tree):
         sel = tree.selection()
         if not sel: return
-        values = tree.item(sel[0])['values']
-        patient = dict(zip(DEFAULT_COLUMNS, values))
+        patient = dict(zip(DEFAULT_COLUMNS, tree.row_values[sel[0]]))
         self._show_patient_detail(patient)
 
     def _show_patient_detail(self, patient):
         win = tk.Toplevel(self)
         win.title(f"Details - {patient.get('Name', '')}")
         win.geometry("480x640")
-        top = tk.Frame(win, bg='#f0f8ff')
+        top = tk.Frame(win, bg=BG)
         top.pack(fill='both', expand=True, padx=10, pady=10)
 
         pp = patient.get('PhotoPath', '')
-        if pp and os.path.exists(str(pp)):
+        if self._photo_exists(pp):
             try:
-                img = Image.open(pp)
-                img.thumbnail((200, 200))
-                photo = ImageTk.PhotoImage(img)
-                lbl = tk.Label(top, image=photo, bg='#f0f8ff')
+                photo = self._get_thumbnail(str(pp))
+                lbl = tk.Label(top, image=photo, bg=BG)
                 lbl.image = photo
                 lbl.pack(pady=8)
             except Exception:
-                tk.Label(top, text="(Photo cannot be shown)", bg='#f0f8ff').pack()
+                tk.Label(top, text="(Photo cannot be shown)", bg=BG).pack()
         else:
-            tk.Label(top, text="(No Photo)", bg='#f0f8ff').pack(pady=8)
+            tk.Label(top, text="(No Photo)", bg=BG).pack(pady=8)
 
-        info = tk.Frame(top, bg='#f0f8ff')
+        info = tk.Frame(top, bg=BG)
         info.pack(fill='both', expand=True)
         for c in DEFAULT_COLUMNS:
             v = patient.get(c, '')
             if pd.isna(v): v = ''
-            tk.Label(info, text=f"{c}: {v}", anchor='w', justify='left', wraplength=420, bg='#f0f8ff').pack(fill='x', padx=6, pady=2)
+            tk.Label(info, text=f"{c}: {v}", anchor='w', justify='left', wraplength=420, bg=BG).pack(fill='x', padx=6, pady=2)
 
-        btnf = tk.Frame(win, bg='#f0f8ff')
+        btnf = tk.Frame(win, bg=BG)
         btnf.pack(fill='x', pady=8)
         tk.Button(btnf, text="Export as PDF", bg='#28a745', fg='white', command=lambda: self._export_pdf_for_patient(patient)).pack(side='left', padx=6)
         tk.Button(btnf, text="Open Photo", bg='#4c72b0', fg='white', command=lambda: self._open_photo(patient)).pack(side='left', padx=6)
@@ -438,27 +880,38 @@ class PatientManagementSystem(tk.Tk):
         else:
             fname = path
 
-        try:
+        has_photo = self._photo_exists(patient.get('PhotoPath', ''))
+        def build():
             doc = SimpleDocTemplate(fname, pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-            story.append(Paragraph("<b>Patient Report</b>", styles['Title']))
-            story.append(Spacer(1, 12))
-            img_path = patient.get('PhotoPath', '')
-            if img_path and os.path.exists(str(img_path)):
-                story.append(ReportImage(img_path, width=200, height=200))
-                story.append(Spacer(1, 12))
-            for col in DEFAULT_COLUMNS:
-                val = str(patient.get(col, ''))
-                story.append(Paragraph(f"<b>{col}:</b> {val}", styles['Normal']))
-            doc.build(story)
-            if path is None: messagebox.showinfo("Export", f"Saved PDF: {fname}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not export PDF: {e}")
+            doc.build(self._patient_story(patient, "<b>Patient Report</b>", 200, has_photo, doc.width))
+        self._run_in_background(build, lambda: messagebox.showinfo("Export", f"Saved PDF: {fname}") if path is None else None)
+
+    @cached_property
+    def _pdf_styles(self):
+        return getSampleStyleSheet()
+
+    def _patient_story(self, patient, title, photo_size, has_photo, width):
+        # Shared by single and bulk PDF export; the fields are one Table so only long values need Paragraph parsing
+        styles = self._pdf_styles
+        story = [Paragraph(title, styles['Title']), Spacer(1, 12)]
+        img_path = patient.get('PhotoPath', '')
+        # has_photo comes from the cached PHOTO_DIR listing; re-check on disk so a photo deleted outside the
+        # app is skipped instead of failing the whole export
+        if has_photo and os.path.exists(img_path):
+            story += [ReportImage(img_path, width=photo_size, height=photo_size), Spacer(1, 12)]
+        value_width = width - PDF_LABEL_WIDTH
+        rows = []
+        for col in DEFAULT_COLUMNS:
+            v = patient.get(col, '')
+            v = '' if pd.isna(v) else str(v)
+            if stringWidth(v, PDF_FONT, PDF_FONT_SIZE) > value_width - PDF_CELL_PADDING: v = Paragraph(escape(v), styles['Normal'])
+            rows.append([f"{col}:", v])
+        story.append(Table(rows, colWidths=[PDF_LABEL_WIDTH, value_width], style=PDF_TABLE_STYLE, hAlign='LEFT'))
+        return story
 
     def _open_photo(self, patient):
         p = patient.get('PhotoPath', '')
-        if not p or not os.path.exists(str(p)):
+        if not self._photo_exists(p):
             messagebox.showinfo("No Photo", "No photo for this patient")
             return
         try:
@@ -468,30 +921,31 @@ class PatientManagementSystem(tk.Tk):
             messagebox.showerror("Error", f"Could not open photo: {e}")
 
     def show_edit_patients(self):
+        if self._show_cached('edit'): return
         self.clear_frame()
-        frame = tk.Frame(self, bg='#f0f8ff')
+        frame = tk.Frame(self, bg=BG)
         frame.pack(fill='both', expand=True, padx=12, pady=12)
         self.current_frame = frame
-        header = tk.Frame(frame, bg='#2c5aa0')
+        header = tk.Frame(frame, bg=HEADER_BG)
         header.pack(fill='x', pady=(0, 8))
-        tk.Label(header, text="Edit Patients", font=("Arial", 16, "bold"), fg='white', bg='#2c5aa0').pack(pady=8)
-        filter_frame = tk.Frame(frame, bg='#f0f8ff')
+        tk.Label(header, text="Edit Patients", font=("Arial", 16, "bold"), fg='white', bg=HEADER_BG).pack(pady=8)
+        filter_frame = tk.Frame(frame, bg=BG)
         filter_frame.pack(fill='x', pady=6)
-        tk.Label(filter_frame, text="Search:", bg='#f0f8ff').pack(side='left', padx=6)
+        tk.Label(filter_frame, text="Search:", bg=BG).pack(side='left', padx=6)
         self.search_var = tk.StringVar()
         search_entry = tk.Entry(filter_frame, textvariable=self.search_var, width=30)
         search_entry.pack(side='left')
-        tk.Label(filter_frame, text="Gender Filter:", bg='#f0f8ff').pack(side='left', padx=(20, 6))
+        tk.Label(filter_frame, text="Gender Filter:", bg=BG).pack(side='left', padx=(20, 6))
         self.gender_filter_var = tk.StringVar(value="All")
-        gender_options = ["All"] + list(self.patients_df['Gender'].dropna().unique())
+        gender_options = ["All"] + list(self.patients_df['Gender'].cat.categories)
         gender_combo = ttk.Combobox(filter_frame, textvariable=self.gender_filter_var, values=gender_options, state='readonly')
         gender_combo.pack(side='left')
-        tk.Label(filter_frame, text="Sort By:", bg='#f0f8ff').pack(side='left', padx=(20, 6))
+        tk.Label(filter_frame, text="Sort By:", bg=BG).pack(side='left', padx=(20, 6))
         self.sort_by_var = tk.StringVar(value="SerialNo")
         sort_options = ['SerialNo', 'Name', 'Age', 'StartDate', 'EndDate']
         sort_combo = ttk.Combobox(filter_frame, textvariable=self.sort_by_var, values=sort_options, state='readonly')
         sort_combo.pack(side='left')
-        action_frame = tk.Frame(frame, bg='#f0f8ff')
+        action_frame = tk.Frame(frame, bg=BG)
         action_frame.pack(fill='x', pady=5)
         cols = DEFAULT_COLUMNS.copy()
         tree = ttk.Treeview(frame, columns=cols, show='headings', height=PAGE_SIZE)
@@ -501,9 +955,9 @@ class PatientManagementSystem(tk.Tk):
         tree.pack(fill='both', expand=True, pady=8)
         tree.bind('<Double-1>', lambda e: self._edit_open_window(tree))
         self.current_page = {'i': 0}
-        nav = tk.Frame(frame, bg='#f0f8ff')
+        nav = tk.Frame(frame, bg=BG)
         nav.pack(fill='x')
-        page_label = tk.Label(frame, text="Page 1", bg='#f0f8ff')
+        page_label = tk.Label(frame, text="Page 1", bg=BG)
         def refresh_edit():
             self.search_var.set("")
             self.gender_filter_var.set("All")
@@ -518,32 +972,25 @@ class PatientManagementSystem(tk.Tk):
         tk.Button(nav, text="Prev", command=lambda: self._edit_page_change(-1, tree, page_label)).pack(side='left', padx=6)
         tk.Button(nav, text="Next", command=lambda: self._edit_page_change(1, tree, page_label)).pack(side='left', padx=6)
         page_label.pack(side='left', padx=6)
-        self._edit_refresh(tree=tree, page_label=page_label)
+        state = (self.search_var, self.gender_filter_var, self.sort_by_var, self.current_page)
+        def activate():
+            self.search_var, self.gender_filter_var, self.sort_by_var, self.current_page = state
+            gender_combo['values'] = ["All"] + list(self.patients_df['Gender'].cat.categories)
+            self._edit_refresh(tree=tree, page_label=page_label)
+        self._register_frame('edit', frame, activate)
         
     def _edit_get_filtered_df(self):
-        df = self.patients_df.copy()
-        s = (self.search_var.get() or "").strip().lower()
-        if s: df = df[df.apply(lambda r: any(s in str(cell).lower() for cell in r), axis=1)]
-        gender_filter = self.gender_filter_var.get()
-        if gender_filter != "All": df = df[df['Gender'] == gender_filter]
-        sort_by = self.sort_by_var.get()
-        if sort_by in df.columns:
-            try:
-                if sort_by in ['SerialNo', 'Age']: df[sort_by] = pd.to_numeric(df[sort_by], errors='coerce')
-                df = df.sort_values(by=sort_by, na_position='last')
-            except Exception: pass
-        return df.reset_index(drop=True)
+        # Same search/gender/sort filters as the records view, so share its cache
+        return self._get_filtered_df()
 
     def _edit_refresh(self, tree, page_label):
         if tree is None: return
-        for it in tree.get_children(): tree.delete(it)
+        tree.delete(*tree.get_children())
         df = self._edit_get_filtered_df()
         total = max(1, (len(df) + PAGE_SIZE - 1) // PAGE_SIZE)
         if self.current_page['i'] >= total: self.current_page['i'] = 0
         start = self.current_page['i'] * PAGE_SIZE
-        for _, r in df.iloc[start:start + PAGE_SIZE].iterrows():
-            vals = [r.get(c, '') for c in DEFAULT_COLUMNS]
-            tree.insert('', 'end', values=vals)
+        self._fill_tree(tree, table_rows(df.iloc[start:start + PAGE_SIZE], DEFAULT_COLUMNS))
         if page_label: page_label.config(text=f"Page {self.current_page['i'] + 1} / {total} (Total: {len(df)})")
 
     def _edit_page_change(self, delta, tree, page_label):
@@ -557,15 +1004,14 @@ class PatientManagementSystem(tk.Tk):
     def _edit_open_window(self, tree):
         sel = tree.selection()
         if not sel: return
-        vals = tree.item(sel[0])['values']
-        record = dict(zip(DEFAULT_COLUMNS, vals))
+        record = dict(zip(DEFAULT_COLUMNS, tree.row_values[sel[0]]))
         original_serial = record.get('SerialNo')
         win = tk.Toplevel(self)
         win.title(f"Edit - {record.get('Name', '')}")
         win.geometry("650x680")
-        canvas = tk.Canvas(win, bg='#f0f8ff', highlightthickness=0)
+        canvas = tk.Canvas(win, bg=BG, highlightthickness=0)
         scroll = ttk.Scrollbar(win, orient='vertical', command=canvas.yview)
-        content = tk.Frame(canvas, bg='#f0f8ff')
+        content = tk.Frame(canvas, bg=BG)
         content.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
         canvas.create_window((0, 0), window=content, anchor='nw')
         canvas.configure(yscrollcommand=scroll.set)
@@ -573,94 +1019,102 @@ class PatientManagementSystem(tk.Tk):
         scroll.pack(side='right', fill='y')
         entries = {}
         for i, col in enumerate(['SerialNo', 'Name', 'Email', 'Gender', 'Age', 'Address', 'PhoneNo', 'Occupation', 'AadharNo', 'StartDate', 'EndDate', 'Satisfied']):
-            row = tk.Frame(content, bg='#f0f8ff')
+            row = tk.Frame(content, bg=BG)
             row.pack(fill='x', pady=6, padx=8)
-            tk.Label(row, text=f"{col}:", width=18, anchor='e', bg='#f0f8ff').pack(side='left', padx=(0, 8))
+            tk.Label(row, text=f"{col}:", width=18, anchor='e', bg=BG).pack(side='left', padx=(0, 8))
             val = record.get(col, '')
             var = tk.StringVar(value=str(val))
             ent = tk.Entry(row, textvariable=var, width=40)
             ent.pack(side='left', fill='x', expand=True)
             entries[col] = var
-        row_photo = tk.Frame(content, bg='#f0f8ff'); row_photo.pack(fill='x', pady=6, padx=8)
-        tk.Label(row_photo, text="Photo:", width=18, anchor='e', bg='#f0f8ff').pack(side='left', padx=(0, 8))
+        row_photo = tk.Frame(content, bg=BG); row_photo.pack(fill='x', pady=6, padx=8)
+        tk.Label(row_photo, text="Photo:", width=18, anchor='e', bg=BG).pack(side='left', padx=(0, 8))
         tk.Button(row_photo, text="Add/Update Photo", bg='#4c72b0', fg='white', command=lambda: self._edit_add_photo(original_serial)).pack(side='left', padx=4)
         tk.Button(row_photo, text="Remove Photo", bg='#dc3545', fg='white', command=lambda: self._edit_remove_photo(original_serial)).pack(side='left', padx=4)
-        row_symp = tk.Frame(content, bg='#f0f8ff'); row_symp.pack(fill='x', pady=6, padx=8)
-        tk.Label(row_symp, text="Symptoms:", width=18, anchor='e', bg='#f0f8ff').pack(side='left', padx=(0, 8))
+        row_symp = tk.Frame(content, bg=BG); row_symp.pack(fill='x', pady=6, padx=8)
+        tk.Label(row_symp, text="Symptoms:", width=18, anchor='e', bg=BG).pack(side='left', padx=(0, 8))
         sym = scrolledtext.ScrolledText(row_symp, height=4, width=46)
         sym.pack(side='left', fill='both', expand=True)
         sym.delete("1.0", "end"); sym.insert("1.0", record.get('Symptoms', ''))
-        row_treat = tk.Frame(content, bg='#f0f8ff'); row_treat.pack(fill='x', pady=6, padx=8)
-        tk.Label(row_treat, text="Treatment:", width=18, anchor='e', bg='#f0f8ff').pack(side='left', padx=(0, 8))
+        row_treat = tk.Frame(content, bg=BG); row_treat.pack(fill='x', pady=6, padx=8)
+        tk.Label(row_treat, text="Treatment:", width=18, anchor='e', bg=BG).pack(side='left', padx=(0, 8))
         treat = scrolledtext.ScrolledText(row_treat, height=4, width=46)
         treat.pack(side='left', fill='both', expand=True)
         treat.delete("1.0", "end"); treat.insert("1.0", record.get('Treatment', ''))
         def save_changes():
             try:
-                idx_list = self.patients_df[self.patients_df['SerialNo'] == str(original_serial)].index
-                if not idx_list.any():
+                idx = self._get_serial_index().get(str(original_serial))
+                if idx is None:
                     messagebox.showerror("Error", "Could not find patient to update.")
                     return
-                idx = idx_list[0]
                 new_serial = entries['SerialNo'].get()
-                if new_serial != str(original_serial) and new_serial in self.patients_df['SerialNo'].values:
+                if new_serial != str(original_serial) and new_serial in self._get_serial_index():
                     messagebox.showerror("Error", f"Serial number {new_serial} already exists.")
                     return
-                for col, var in entries.items(): self.patients_df.at[idx, col] = var.get()
-                self.patients_df.at[idx, 'Symptoms'] = sym.get("1.0", "end").strip()
-                self.patients_df.at[idx, 'Treatment'] = treat.get("1.0", "end").strip()
+                if not is_whole_number(entries['Age'].get().strip()):
+                    messagebox.showerror("Error", "Age must be a numeric value.")
+                    return
+                if not all(is_valid_date(entries[c].get().strip()) for c in DATE_COLUMNS):
+                    messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format.")
+                    return
+                values = coerce_to_dtypes({col: var.get() for col, var in entries.items()})
+                add_categories(self.patients_df, values)
+                values['Symptoms'] = sym.get("1.0", "end").strip()
+                values['Treatment'] = treat.get("1.0", "end").strip()
+                values.update({key: parse_sort_key(col, values[col]) for col, key in SORT_KEYS.items()})
+                # One row write covering the edited fields and their sort keys
+                self.patients_df.loc[idx, list(values)] = list(values.values())
                 self.save_patients()
                 messagebox.showinfo("Saved", "Patient updated")
                 win.destroy()
                 self.show_edit_patients()
             except Exception as e: messagebox.showerror("Error", f"Could not save: {e}")
-        btnf = tk.Frame(content, bg='#f0f8ff'); btnf.pack(pady=8)
+        btnf = tk.Frame(content, bg=BG); btnf.pack(pady=8)
         tk.Button(btnf, text="Save Changes", bg='#28a745', fg='white', command=save_changes).pack()
 
     def _edit_add_photo(self, serial):
         path = filedialog.askopenfilename(title="Select Photo", filetypes=[("Image", "*.jpg *.jpeg *.png *.bmp")])
         if not path: return
-        os.makedirs(PHOTO_DIR, exist_ok=True)
-        fname = f"patient_{serial}.png"
-        dest = os.path.join(PHOTO_DIR, fname)
         try:
-            img = Image.open(path)
-            img.save(dest, format='PNG')
-            idx = self.patients_df[self.patients_df['SerialNo'] == str(serial)].index[0]
+            dest = save_photo(path, serial)
+            idx = self._get_serial_index()[str(serial)]
             self.patients_df.at[idx, 'PhotoPath'] = dest
+            self._refresh_photo_index()
             self.save_patients()
             messagebox.showinfo("Photo", "Photo updated successfully.")
         except Exception as e: messagebox.showerror("Error", f"Could not update photo: {e}")
 
     def _edit_remove_photo(self, serial):
-        idx = self.patients_df[self.patients_df['SerialNo'] == str(serial)].index[0]
+        idx = self._get_serial_index()[str(serial)]
         path = self.patients_df.at[idx, 'PhotoPath']
-        if not path or not os.path.exists(str(path)):
+        if not self._photo_exists(path):
             messagebox.showinfo("Info", "No photo to remove.")
             return
         if messagebox.askyesno("Confirm", "Are you sure you want to remove this patient's photo?"):
             try:
                 os.remove(path)
+                self._refresh_photo_index()
                 self.patients_df.at[idx, 'PhotoPath'] = ''
                 self.save_patients()
                 messagebox.showinfo("Photo", "Photo removed successfully.")
             except Exception as e: messagebox.showerror("Error", f"Could not remove photo: {e}")
 
     def show_delete_patients(self):
+        if self._show_cached('delete'): return
         self.clear_frame()
-        frame = tk.Frame(self, bg='#f0f8ff')
+        frame = tk.Frame(self, bg=BG)
         frame.pack(fill='both', expand=True, padx=12, pady=12)
         self.current_frame = frame
-        header = tk.Frame(frame, bg='#2c5aa0')
+        header = tk.Frame(frame, bg=HEADER_BG)
         header.pack(fill='x', pady=(0, 8))
-        tk.Label(header, text="Delete Patients", font=("Arial", 16, "bold"), fg='white', bg='#2c5aa0').pack(pady=8)
-        filter_frame = tk.Frame(frame, bg='#f0f8ff')
+        tk.Label(header, text="Delete Patients", font=("Arial", 16, "bold"), fg='white', bg=HEADER_BG).pack(pady=8)
+        filter_frame = tk.Frame(frame, bg=BG)
         filter_frame.pack(fill='x', pady=6)
-        tk.Label(filter_frame, text="Search:", bg='#f0f8ff').pack(side='left', padx=6)
+        tk.Label(filter_frame, text="Search:", bg=BG).pack(side='left', padx=6)
         self.search_var = tk.StringVar()
         search_entry = tk.Entry(filter_frame, textvariable=self.search_var, width=30)
         search_entry.pack(side='left')
-        action_frame = tk.Frame(frame, bg='#f0f8ff')
+        action_frame = tk.Frame(frame, bg=BG)
         action_frame.pack(fill='x', pady=5)
         
         cols = ['Select'] + DEFAULT_COLUMNS
@@ -671,8 +1125,9 @@ class PatientManagementSystem(tk.Tk):
             tree.heading(c, text=c)
             tree.column(c, width=100 if c != 'Name' else 160)
         tree.pack(fill='both', expand=True, pady=8)
+        tree.row_pool = [tree.insert('', 'end') for _ in range(PAGE_SIZE)]
         
-        page_label = tk.Label(frame, text="Page 1", bg='#f0f8ff')
+        page_label = tk.Label(frame, text="Page 1", bg=BG)
 
         def refresh_delete():
             self.search_var.set("")
@@ -705,33 +1160,27 @@ class PatientManagementSystem(tk.Tk):
         tree.bind('<Button-1>', on_click)
         
         self.current_page = {'i': 0}
-        nav = tk.Frame(frame, bg='#f0f8ff')
+        nav = tk.Frame(frame, bg=BG)
         nav.pack(fill='x')
         tk.Button(nav, text="Prev", command=lambda: self._delete_page_change(-1, tree, page_label)).pack(side='left', padx=6)
         tk.Button(nav, text="Next", command=lambda: self._delete_page_change(1, tree, page_label)).pack(side='left', padx=6)
         tk.Button(nav, text="Delete Selected", bg='#dc3545', fg='white', command=lambda: self._delete_checked(tree)).pack(side='left', padx=8)
         page_label.pack(side='left', padx=6)
-        self._delete_refresh(tree=tree, page_label=page_label)
+        state = (self.search_var, self.current_page, self.checkbox_state)
+        def activate():
+            self.search_var, self.current_page, self.checkbox_state = state
+            self._delete_refresh(tree=tree, page_label=page_label)
+        self._register_frame('delete', frame, activate)
         
     def _delete_get_filtered_df(self):
-        df = self.patients_df.copy()
+        # Every column is searched, so reuse the cached blob that view and edit scan
         s = (self.search_var.get() or "").strip().lower()
-        if s: df = df[df.apply(lambda r: any(s in str(cell).lower() for cell in r), axis=1)]
-        return df.reset_index(drop=True)
+        if not s: return self.patients_df
+        return self._memo_filter('delete', (s,), lambda: self.patients_df[self._get_search_blob().str.contains(s, regex=False, na=False)])
 
     def _delete_refresh(self, tree, page_label):
         if tree is None: return
-        for it in tree.get_children(): tree.delete(it)
-        self.checkbox_state.clear()
-        df = self._delete_get_filtered_df()
-        total = max(1, (len(df) + PAGE_SIZE - 1) // PAGE_SIZE)
-        if self.current_page['i'] >= total: self.current_page['i'] = 0
-        start = self.current_page['i'] * PAGE_SIZE
-        for _, r in df.iloc[start:start + PAGE_SIZE].iterrows():
-            vals = ['☐'] + [r.get(c, '') for c in DEFAULT_COLUMNS]
-            iid = tree.insert('', 'end', values=vals)
-            self.checkbox_state[iid] = False
-        if page_label: page_label.config(text=f"Page {self.current_page['i'] + 1} / {total} (Total: {len(df)})")
+        self._fill_checkbox_page(tree, page_label, self._delete_get_filtered_df(), DEFAULT_COLUMNS)
             
     def _delete_page_change(self, delta, tree, page_label):
         df = self._delete_get_filtered_df()
@@ -742,43 +1191,46 @@ class PatientManagementSystem(tk.Tk):
             self._delete_refresh(tree, page_label)
 
     def _delete_checked(self, tree):
-        serials_to_delete = [str(tree.item(iid)['values'][1]) for iid, checked in self.checkbox_state.items() if checked]
+        serials_to_delete = {tree.row_serials[iid] for iid, checked in self.checkbox_state.items() if checked}
         if not serials_to_delete:
             messagebox.showwarning("Warning", "No checked records to delete")
             return
         if not messagebox.askyesno("Confirm", f"Delete {len(serials_to_delete)} checked records?"): return
-        self.patients_df = self.patients_df[~self.patients_df['SerialNo'].isin(serials_to_delete)].reset_index(drop=True)
+        # Row labels are allowed to have gaps, so there is no reset_index copy of what remains
+        self.patients_df = self.patients_df[~self.patients_df['SerialNo'].isin(serials_to_delete)]
         self.save_patients()
         messagebox.showinfo("Deleted", f"Deleted {len(serials_to_delete)} records")
         self.show_delete_patients()
 
     def show_share_details(self):
+        if self._show_cached('share'): return
         self.clear_frame()
-        frame = tk.Frame(self, bg='#f0f8ff')
+        frame = tk.Frame(self, bg=BG)
         frame.pack(fill='both', expand=True, padx=12, pady=12)
         self.current_frame = frame
 
-        header = tk.Frame(frame, bg='#2c5aa0')
+        header = tk.Frame(frame, bg=HEADER_BG)
         header.pack(fill='x', pady=(0, 8))
-        tk.Label(header, text="Share / Export Patient Details", font=("Arial", 16, "bold"), fg='white', bg='#2c5aa0').pack(pady=8)
+        tk.Label(header, text="Share / Export Patient Details", font=("Arial", 16, "bold"), fg='white', bg=HEADER_BG).pack(pady=8)
         
-        toolbar = tk.Frame(frame, bg='#f0f8ff')
+        toolbar = tk.Frame(frame, bg=BG)
         toolbar.pack(fill='x', pady=6)
-        tk.Label(toolbar, text="Search:", bg='#f0f8ff').pack(side='left', padx=6)
+        tk.Label(toolbar, text="Search:", bg=BG).pack(side='left', padx=6)
         self.search_var = tk.StringVar()
         search_entry = tk.Entry(toolbar, textvariable=self.search_var, width=30)
         search_entry.pack(side='left')
         
-        cols = ['Select'] + ['SerialNo', 'Name', 'Email', 'PhoneNo']
+        cols = ['Select'] + SHARE_COLUMNS
         tree = ttk.Treeview(frame, columns=cols, show='headings', height=PAGE_SIZE, selectmode='extended')
         tree.heading('Select', text='✔')
         tree.column('Select', width=50, anchor='center')
-        for c in ['SerialNo', 'Name', 'Email', 'PhoneNo']:
+        for c in SHARE_COLUMNS:
             tree.heading(c, text=c)
             tree.column(c, width=180)
         tree.pack(fill='both', expand=True, pady=8)
+        tree.row_pool = [tree.insert('', 'end') for _ in range(PAGE_SIZE)]
 
-        page_label = tk.Label(frame, text="Page 1", bg='#f0f8ff')
+        page_label = tk.Label(frame, text="Page 1", bg=BG)
         
         def refresh_share():
             self.search_var.set("")
@@ -804,13 +1256,13 @@ class PatientManagementSystem(tk.Tk):
         tree.bind('<Button-1>', on_click)
         
         self.current_page = {'i': 0}
-        nav = tk.Frame(frame, bg='#f0f8ff')
+        nav = tk.Frame(frame, bg=BG)
         nav.pack(fill='x')
         tk.Button(nav, text="Prev", command=lambda: self._share_page_change(-1, tree, page_label)).pack(side='left', padx=6)
         tk.Button(nav, text="Next", command=lambda: self._share_page_change(1, tree, page_label)).pack(side='left', padx=6)
         page_label.pack(side='left', padx=6)
         
-        btns = tk.Frame(frame, bg='#f0f8ff')
+        btns = tk.Frame(frame, bg=BG)
         btns.pack(fill='x', pady=6)
 
         def _share_toggle_all():
@@ -824,32 +1276,23 @@ class PatientManagementSystem(tk.Tk):
         tk.Button(btns, text="Export Selected to Excel", bg='#28a745', fg='white', command=lambda: self._share_export_excel(tree)).pack(side='left', padx=6)
         tk.Button(btns, text="Export Selected as PDF", bg='#28a745', fg='white', command=lambda: self._share_export_pdf(tree)).pack(side='left', padx=6)
         tk.Button(btns, text="Show Statistics", bg='#17a2b8', fg='white', command=lambda: self._share_show_stats(tree)).pack(side='left', padx=6)
-        
-        self._share_refresh(tree=tree, page_label=page_label)
+
+        state = (self.search_var, self.current_page, self.checkbox_state)
+        def activate():
+            self.search_var, self.current_page, self.checkbox_state = state
+            self._share_refresh(tree=tree, page_label=page_label)
+        self._register_frame('share', frame, activate)
     
     def _share_get_filtered_df(self):
-        df = self.patients_df.copy()
         s = (self.search_var.get() or "").strip().lower()
-        if s:
-            search_cols = ['SerialNo', 'Name', 'Email', 'PhoneNo']
-            df = df[df.apply(lambda r: any(s in str(r.get(c, '')).lower() for c in search_cols), axis=1)]
-        return df.reset_index(drop=True)
+        if not s: return self.patients_df
+        # Route by the shape of the query: an address can only match Email, a digit string cannot match a name
+        cols = ['Email'] if '@' in s else ['SerialNo', 'Email', 'PhoneNo'] if s.isdigit() else SHARE_COLUMNS
+        return self._memo_filter('share', (s,), lambda: self.patients_df[contains_any(self._get_search_lower()[cols], s)])
 
     def _share_refresh(self, tree, page_label):
         if tree is None: return
-        for it in tree.get_children(): tree.delete(it)
-        self.checkbox_state.clear()
-        df = self._share_get_filtered_df()
-        
-        total = max(1, (len(df) + PAGE_SIZE - 1) // PAGE_SIZE)
-        if self.current_page['i'] >= total: self.current_page['i'] = 0
-
-        start = self.current_page['i'] * PAGE_SIZE
-        for _, r in df.iloc[start:start + PAGE_SIZE].iterrows():
-            vals = ['☐'] + [r.get(c, '') for c in ['SerialNo', 'Name', 'Email', 'PhoneNo']]
-            iid = tree.insert('', 'end', values=vals)
-            self.checkbox_state[iid] = False
-        if page_label: page_label.config(text=f"Page {self.current_page['i'] + 1} / {total} (Total: {len(df)})")
+        self._fill_checkbox_page(tree, page_label, self._share_get_filtered_df(), SHARE_COLUMNS)
             
     def _share_page_change(self, delta, tree, page_label):
         df = self._share_get_filtered_df()
@@ -860,11 +1303,11 @@ class PatientManagementSystem(tk.Tk):
             self._share_refresh(tree, page_label)
 
     def _share_get_selected_records(self, tree):
-        serials = [str(tree.item(iid)['values'][1]) for iid, checked in self.checkbox_state.items() if checked]
+        serials = [tree.row_serials[iid] for iid, checked in self.checkbox_state.items() if checked]
         if not serials:
             messagebox.showwarning("Warning", "No records selected.")
             return pd.DataFrame()
-        return self.patients_df[self.patients_df['SerialNo'].isin(serials)]
+        return self.patients_df[self.patients_df['SerialNo'].isin(set(serials))]
 
     def _share_export_excel(self, tree):
         df = self._share_get_selected_records(tree)
@@ -872,7 +1315,7 @@ class PatientManagementSystem(tk.Tk):
         path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")])
         if not path: return
         try:
-            df.to_excel(path, index=False)
+            df[DEFAULT_COLUMNS].to_excel(path, index=False, engine=EXCEL_WRITER)
             messagebox.showinfo("Exported", f"Exported {len(df)} record(s) to {path}")
         except Exception as e:
             messagebox.showerror("Error", f"Could not export: {e}")
@@ -882,25 +1325,18 @@ class PatientManagementSystem(tk.Tk):
         if df.empty: return
         path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF files", "*.pdf")])
         if not path: return
-        try:
+        # Checked once per distinct path on the Tk thread, before the worker starts
+        valid_photo = {p: self._photo_exists(p) for p in df['PhotoPath'].unique()}
+
+        def build():
             doc = SimpleDocTemplate(path, pagesize=A4)
-            styles = getSampleStyleSheet()
             story = []
-            for i, patient in df.iterrows():
+            for row in df[DEFAULT_COLUMNS].itertuples(index=False, name=None):
+                patient = dict(zip(DEFAULT_COLUMNS, row))
                 if story: story.append(PageBreak())
-                story.append(Paragraph(f"<b>Patient Report: {patient.get('Name')}</b>", styles['Title']))
-                story.append(Spacer(1, 12))
-                img_path = patient.get('PhotoPath', '')
-                if img_path and os.path.exists(str(img_path)):
-                    story.append(ReportImage(img_path, width=150, height=150))
-                    story.append(Spacer(1, 12))
-                for col in DEFAULT_COLUMNS:
-                    val = str(patient.get(col, ''))
-                    story.append(Paragraph(f"<b>{col}:</b> {val}", styles['Normal']))
+                story += self._patient_story(patient, f"<b>Patient Report: {escape(str(patient.get('Name')))}</b>", 150, valid_photo.get(patient['PhotoPath'], False), doc.width)
             doc.build(story)
-            messagebox.showinfo("Export", f"Saved PDF: {path}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not export PDF: {e}")
+        self._run_in_background(build, lambda: messagebox.showinfo("Export", f"Saved PDF: {path}"))
 
     def _share_show_stats(self, tree):
         df = self._share_get_selected_records(tree)
@@ -908,28 +1344,26 @@ class PatientManagementSystem(tk.Tk):
         win = tk.Toplevel(self)
         win.title("Selected Patients Statistics")
         win.geometry("500x300")
-        win.configure(bg='#f0f8ff')
-        total = len(df)
-        df['Age'] = pd.to_numeric(df['Age'], errors='coerce')
-        males, females = int((df["Gender"] == "Male").sum()), int((df["Gender"] == "Female").sum())
-        others, avg_age = total - males - females, df['Age'].mean()
-        tk.Label(win, text=f"Total Patients Selected: {total}", font=("Arial", 12, "bold"), bg='#f0f8ff').pack(pady=4)
-        tk.Label(win, text=f"Male: {males} ({males / total * 100:.1f}%)", font=("Arial", 10), bg='#f0f8ff').pack()
-        tk.Label(win, text=f"Female: {females} ({females / total * 100:.1f}%)", font=("Arial", 10), bg='#f0f8ff').pack()
-        tk.Label(win, text=f"Other: {others} ({others / total * 100:.1f}%)", font=("Arial", 10), bg='#f0f8ff').pack()
-        tk.Label(win, text=f"Average Age: {avg_age:.1f}", font=("Arial", 10), bg='#f0f8ff').pack(pady=4)
-        tk.Label(win, text=f"Most Common Symptom: {get_most_common(df, 'Symptoms')}", font=("Arial", 10), bg='#f0f8ff').pack()
-        tk.Label(win, text=f"Average Treatment Duration: {get_average_duration(df)}", font=("Arial", 10), bg='#f0f8ff').pack(pady=4)
+        win.configure(bg=BG)
+        total, males, females, others, avg_age, symptom, duration = summary_stats(df)
+        tk.Label(win, text=f"Total Patients Selected: {total}", font=("Arial", 12, "bold"), bg=BG).pack(pady=4)
+        tk.Label(win, text=f"Male: {males} ({males / total * 100:.1f}%)", font=("Arial", 10), bg=BG).pack()
+        tk.Label(win, text=f"Female: {females} ({females / total * 100:.1f}%)", font=("Arial", 10), bg=BG).pack()
+        tk.Label(win, text=f"Other: {others} ({others / total * 100:.1f}%)", font=("Arial", 10), bg=BG).pack()
+        tk.Label(win, text=f"Average Age: {avg_age:.1f}", font=("Arial", 10), bg=BG).pack(pady=4)
+        tk.Label(win, text=f"Most Common Symptom: {symptom}", font=("Arial", 10), bg=BG).pack()
+        tk.Label(win, text=f"Average Treatment Duration: {duration}", font=("Arial", 10), bg=BG).pack(pady=4)
 
     def show_manage_patient(self):
+        if self._show_cached('manage'): return
         self.clear_frame()
-        frame = tk.Frame(self, bg='#f0f8ff')
+        frame = tk.Frame(self, bg=BG)
         frame.pack(fill='both', expand=True, padx=12, pady=12)
         self.current_frame = frame
-        header = tk.Frame(frame, bg='#2c5aa0')
+        header = tk.Frame(frame, bg=HEADER_BG)
         header.pack(fill='x', pady=(0, 8))
-        tk.Label(header, text="Manage Patients", font=("Arial", 16, "bold"), fg='white', bg='#2c5aa0').pack(pady=8)
-        btns_frame = tk.Frame(frame, bg='#f0f8ff')
+        tk.Label(header, text="Manage Patients", font=("Arial", 16, "bold"), fg='white', bg=HEADER_BG).pack(pady=8)
+        btns_frame = tk.Frame(frame, bg=BG)
         btns_frame.pack(pady=20)
         buttons = [("Backup Database", self._backup_db, '#4c72b0', 'white'), ("Import Database", self._import_db, '#ffc107', 'black'),
                    ("Export All to Excel", self._export_all, '#28a745', 'white'), ("Show Overall Stats", self._show_stats, '#17a2b8', 'white')]
@@ -937,6 +1371,7 @@ class PatientManagementSystem(tk.Tk):
             btn = tk.Button(btns_frame, text=text, width=22, height=2, font=("Arial", 11), command=cmd, bg=bg_color, fg=fg_color, relief='raised', bd=2)
             btn.grid(row=i // 2, column=i % 2, padx=10, pady=8)
         tk.Button(frame, text="Back to Main Menu", width=48, height=2, bg='#6c757d', fg='white', command=self.show_main_menu).pack(pady=20)
+        self._register_frame('manage', frame, lambda: None)
 
     def _backup_db(self):
         if not os.path.exists(DATA_FILE):
@@ -944,6 +1379,7 @@ class PatientManagementSystem(tk.Tk):
             return
         dst = f"patients_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         try:
+            self._wait_for_saves()
             shutil.copy2(DATA_FILE, dst)
             messagebox.showinfo("Backup", f"Backup created: {dst}")
         except Exception as e: messagebox.showerror("Error", f"Could not backup: {e}")
@@ -953,17 +1389,16 @@ class PatientManagementSystem(tk.Tk):
         if not path: return
         if not messagebox.askyesno("Confirm Import", "This will add records from the selected file and assign them new serial numbers. Are you sure?"): return
         try:
-            numeric_serials = pd.to_numeric(self.patients_df['SerialNo'], errors='coerce').dropna()
-            max_existing_serial = int(numeric_serials.max()) if not numeric_serials.empty else 0
-            
-            new_df = pd.read_excel(path)
-            for col in DEFAULT_COLUMNS:
-                if col not in new_df.columns: new_df[col] = ''
-            new_df = new_df[DEFAULT_COLUMNS]
+            first_serial = self._next_serial()
+
+            # Only the known columns are parsed; any the file lacks are filled in by reindex
+            new_df = pd.read_excel(path, engine=EXCEL_ENGINE, usecols=lambda c: c in DEFAULT_COLUMNS, dtype=DTYPES)
+            new_df = new_df.reindex(columns=DEFAULT_COLUMNS, fill_value='')
 
-            new_df['SerialNo'] = range(max_existing_serial + 1, max_existing_serial + 1 + len(new_df))
+            new_df['SerialNo'] = pd.RangeIndex(first_serial, first_serial + len(new_df)).astype(str)
+            add_sort_keys(new_df)
 
-            self.patients_df = pd.concat([self.patients_df, new_df], ignore_index=True)
+            self.patients_df = restore_categories(pd.concat([self.patients_df, new_df], ignore_index=True))
             self.save_patients()
             messagebox.showinfo("Import", f"Database imported successfully. {len(new_df)} new records were added with updated serial numbers.")
         except Exception as e:
@@ -975,43 +1410,50 @@ class PatientManagementSystem(tk.Tk):
             return
         path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel", "*.xlsx")], initialfile="patients_export.xlsx")
         if not path: return
-        try:
-            self.patients_df.to_excel(path, index=False)
-            messagebox.showinfo("Exported", f"Exported all records to {path}")
-        except Exception as e: messagebox.showerror("Error", f"Could not export: {e}")
+        df = self.patients_df[DEFAULT_COLUMNS]
+        self._run_in_background(lambda: df.to_excel(path, index=False, engine=EXCEL_WRITER), lambda: messagebox.showinfo("Exported", f"Exported all records to {path}"))
 
     def _show_stats(self):
         win = tk.Toplevel(self)
         win.title("Overall Patient Statistics")
         win.geometry("500x300")
-        win.configure(bg='#f0f8ff')
-        df = self.patients_df.copy()
+        win.configure(bg=BG)
+        df = self.patients_df
         if df.empty:
-            tk.Label(win, text="No patient data available for statistics.", font=("Arial", 12), bg='#f0f8ff').pack(pady=20)
+            tk.Label(win, text="No patient data available for statistics.", font=("Arial", 12), bg=BG).pack(pady=20)
             return
-        total = len(df)
-        df['Age'] = pd.to_numeric(df['Age'], errors='coerce')
-        males, females = int((df["Gender"] == "Male").sum()), int((df["Gender"] == "Female").sum())
-        others, avg_age = total - males - females, df['Age'].mean()
-        content_frame = tk.Frame(win, bg='#f0f8ff', padx=20, pady=20)
+        # Recomputed only when the data changed since the window was last opened
+        if self._stats_cache[0] != self._df_version: self._stats_cache = (self._df_version, summary_stats(df))
+        total, males, females, others, avg_age, symptom, duration = self._stats_cache[1]
+        content_frame = tk.Frame(win, bg=BG, padx=20, pady=20)
         content_frame.pack(expand=True, fill='both')
         stats = [("Total Patients:", total), ("Male:", f"{males} ({males/total*100:.1f}%)" if total > 0 else 0),
                  ("Female:", f"{females} ({females/total*100:.1f}%)" if total > 0 else 0), ("Other:", f"{others} ({others/total*100:.1f}%)" if total > 0 else 0),
                  ("Average Age:", f"{avg_age:.1f}" if pd.notna(avg_age) else "N/A"),
-                 ("Most Common Symptom:", get_most_common(df, 'Symptoms')), ("Average Treatment Duration:", get_average_duration(df))]
+                 ("Most Common Symptom:", symptom), ("Average Treatment Duration:", duration)]
         for i, (label, value) in enumerate(stats):
-            tk.Label(content_frame, text=label, font=("Arial", 11, "bold"), bg='#f0f8ff', anchor='w').grid(row=i, column=0, sticky='w', pady=4)
-            tk.Label(content_frame, text=value, font=("Arial", 11), bg='#f0f8ff', anchor='w').grid(row=i, column=1, sticky='w', padx=10)
+            tk.Label(content_frame, text=label, font=("Arial", 11, "bold"), bg=BG, anchor='w').grid(row=i, column=0, sticky='w', pady=4)
+            tk.Label(content_frame, text=value, font=("Arial", 11), bg=BG, anchor='w').grid(row=i, column=1, sticky='w', padx=10)
+
+    def _fuzzy_duplicates(self, keys):
+        # The LSH index is rebuilt only when the data changed since the last visit
+        if self._fuzzy_dup_cache[0] != self._df_version:
+            self._fuzzy_dup_cache = (self._df_version, find_fuzzy_duplicates(keys))
+        return self._fuzzy_dup_cache[1]
 
     def show_duplicate_page(self):
+        # Cached until the data changes; the layout itself depends on whether any duplicates exist
+        if self._dup_page_version == self._df_version and self._show_cached('duplicates'): return
+        stale = self._frames.pop('duplicates', None)
         self.clear_frame()
-        frame = tk.Frame(self, bg='#f0f8ff')
+        if stale: stale[0].destroy()
+        frame = tk.Frame(self, bg=BG)
         frame.pack(fill='both', expand=True, padx=12, pady=12)
         self.current_frame = frame
         
-        header = tk.Frame(frame, bg='#2c5aa0')
+        header = tk.Frame(frame, bg=HEADER_BG)
         header.pack(fill='x', pady=(0, 8))
-        tk.Label(header, text="Manage Duplicates", font=("Arial", 16, "bold"), fg='white', bg='#2c5aa0').pack(pady=8)
+        tk.Label(header, text="Manage Duplicates", font=("Arial", 16, "bold"), fg='white', bg=HEADER_BG).pack(pady=8)
         
         # **FIX:** Using a more practical set of columns to identify duplicates.
         # Checking against all columns is too strict and will miss most real duplicates.
@@ -1020,11 +1462,17 @@ class PatientManagementSystem(tk.Tk):
         # Drop records where all key identifiers are missing before checking for duplicates
         df_for_check = self.patients_df.dropna(subset=dup_cols, how='all')
         
-        df_dups = df_for_check[df_for_check.duplicated(subset=dup_cols, keep=False)].sort_values(by=['Name', 'SerialNo'])
+        # Exact pass first; only one row per identical group goes on to the fuzzy stage
+        keys = duplicate_keys(df_for_check, dup_cols)
+        exact_dups, unique_labels = find_exact_duplicates(keys)
+        fuzzy_dups = self._fuzzy_duplicates(keys.loc[unique_labels])
+        df_dups = df_for_check[df_for_check.index.isin(exact_dups | fuzzy_dups)].sort_values(by=['Name', 'SerialNo'])
 
         if df_dups.empty:
-            tk.Label(frame, text="No duplicate patients found.", bg='#f0f8ff', font=("Arial", 12)).pack(pady=20)
+            tk.Label(frame, text="No duplicate patients found.", bg=BG, font=("Arial", 12)).pack(pady=20)
             tk.Button(frame, text="Back", command=self.show_main_menu, bg='#6c757d', fg='white').pack()
+            self._dup_page_version = self._df_version
+            self._register_frame('duplicates', frame, lambda: None)
             return
 
         cols = ['Select'] + DEFAULT_COLUMNS
@@ -1035,12 +1483,29 @@ class PatientManagementSystem(tk.Tk):
             tree.heading(c, text=c)
             tree.column(c, width=100)
         tree.pack(fill='both', expand=True, pady=8)
-        
+        tree.row_pool = [tree.insert('', 'end') for _ in range(PAGE_SIZE)]
+
+        # Rows marked "not duplicate" stay hidden while paging; page_rows maps the visible iids to row labels
         self.checkbox_state = {}
-        for _, r in df_dups.iterrows():
-            vals = ['☐'] + [r.get(c, '') for c in DEFAULT_COLUMNS]
-            iid = tree.insert('', 'end', values=vals)
-            self.checkbox_state[iid] = False
+        self.current_page = {'i': 0}
+        hidden, page_rows = set(), {}
+        nav = tk.Frame(frame, bg=BG)
+        nav.pack(fill='x')
+        page_label = tk.Label(nav, text="Page 1", bg=BG)
+
+        def refresh_dups():
+            page_rows.clear()
+            page_rows.update(self._fill_checkbox_page(tree, page_label, df_dups[~df_dups.index.isin(hidden)], DEFAULT_COLUMNS))
+
+        def change_page(delta):
+            total = max(1, (len(df_dups) - len(hidden) + PAGE_SIZE - 1) // PAGE_SIZE)
+            if 0 <= self.current_page['i'] + delta < total:
+                self.current_page['i'] += delta
+                refresh_dups()
+
+        tk.Button(nav, text="Prev", command=lambda: change_page(-1)).pack(side='left', padx=6)
+        tk.Button(nav, text="Next", command=lambda: change_page(1)).pack(side='left', padx=6)
+        page_label.pack(side='left', padx=6)
 
         def on_click(event):
             region = tree.identify_region(event.x, event.y)
@@ -1058,34 +1523,35 @@ class PatientManagementSystem(tk.Tk):
             column_id = tree.identify_column(event.x)
             if not row_id or column_id != '#2': return
 
-            original_serial = tree.item(row_id)['values'][1]
+            original_serial = tree.row_serials[row_id]
             new_serial = simpledialog.askstring("Edit Serial No", f"Enter new Serial No:", initialvalue=original_serial)
             
             if not new_serial or new_serial == original_serial: return
             if not new_serial.isdigit():
                 messagebox.showerror("Error", "Serial number must be a numeric value.")
                 return
-            if new_serial in self.patients_df['SerialNo'].values:
+            if new_serial in self._get_serial_index():
                 messagebox.showerror("Error", f"Serial number {new_serial} already exists.")
                 return
 
-            idx = self.patients_df[self.patients_df['SerialNo'] == str(original_serial)].index[0]
+            idx = self._get_serial_index()[str(original_serial)]
             self.patients_df.at[idx, 'SerialNo'] = new_serial
+            self._update_sort_keys(idx)
             self.save_patients()
             messagebox.showinfo("Success", "Serial number updated.")
             self.show_duplicate_page()
         tree.bind('<Double-1>', _edit_duplicate_serial)
 
         def get_selected_serials():
-            return [str(tree.item(iid)['values'][1]) for iid, checked in self.checkbox_state.items() if checked]
+            return [tree.row_serials[iid] for iid, checked in self.checkbox_state.items() if checked]
 
         def delete_selected_duplicates():
-            serials_to_delete = get_selected_serials()
+            serials_to_delete = set(get_selected_serials())
             if not serials_to_delete:
                 messagebox.showwarning("Warning", "Select records to delete.")
                 return
             if not messagebox.askyesno("Confirm Delete", f"Delete {len(serials_to_delete)} selected records?"): return
-            self.patients_df = self.patients_df[~self.patients_df['SerialNo'].isin(serials_to_delete)].reset_index(drop=True)
+            self.patients_df = self.patients_df[~self.patients_df['SerialNo'].isin(serials_to_delete)]
             self.save_patients()
             messagebox.showinfo("Success", "Selected duplicates deleted.")
             self.show_duplicate_page()
@@ -1095,17 +1561,23 @@ class PatientManagementSystem(tk.Tk):
             if not iids_to_remove:
                 messagebox.showwarning("Action", "Select records to mark as not duplicate.")
                 return
-            for iid in iids_to_remove:
-                tree.delete(iid)
-                del self.checkbox_state[iid]
+            hidden.update(page_rows[iid] for iid in iids_to_remove)
+            refresh_dups()
             messagebox.showinfo("Action", f"{len(iids_to_remove)} record(s) hidden from this view.")
 
-        btnf = tk.Frame(frame, bg='#f0f8ff')
+        btnf = tk.Frame(frame, bg=BG)
         btnf.pack(pady=10)
         tk.Button(btnf, text="Delete Selected", bg='#dc3545', fg='white', command=delete_selected_duplicates).pack(side='left', padx=10)
         tk.Button(btnf, text="Mark as Not Duplicate (Hide)", bg='#ffc107', command=mark_as_not_duplicate).pack(side='left', padx=10)
         tk.Button(btnf, text="Back", command=self.show_main_menu, bg='#6c757d', fg='white').pack(side='left', padx=10)
 
+        state = (self.current_page, self.checkbox_state)
+        def activate():
+            self.current_page, self.checkbox_state = state
+            refresh_dups()
+        self._dup_page_version = self._df_version
+        self._register_frame('duplicates', frame, activate)
+
 
 if __name__ == "__main__":
     app = PatientManagementSystem()
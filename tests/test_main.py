@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main
+
+
+class TextDateWorkbookTest(unittest.TestCase):
+    # Older workbooks stored StartDate/EndDate as text; editing a row must still assign Timestamps
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self._patch('DATA_FILE', os.path.join(self.tmp.name, 'patients.xlsx'))
+        self._patch('CACHE_FILE', os.path.join(self.tmp.name, 'patients.parquet'))
+        row = {c: '' for c in main.DEFAULT_COLUMNS}
+        row.update(SerialNo='1', Name='Asha', Gender='Female', Age=38, Satisfied='Yes', StartDate='2025-01-05', EndDate='')
+        pd.DataFrame([row], columns=main.DEFAULT_COLUMNS).to_excel(main.DATA_FILE, index=False)
+
+    def _patch(self, name, value):
+        old = getattr(main, name)
+        setattr(main, name, value)
+        self.addCleanup(setattr, main, name, old)
+
+    def test_edit_row_with_text_dates(self):
+        app = main.PatientManagementSystem.__new__(main.PatientManagementSystem)
+        df = app.load_patients()
+        self.assertEqual(len(df), 1)
+        # Same row write as save_changes in the edit dialog
+        values = main.coerce_to_dtypes({'Name': 'Asha K', 'Age': '39.0', 'StartDate': '2025-02-01', 'EndDate': '2025-03-01'})
+        main.add_categories(df, values)
+        values.update({key: main.parse_sort_key(col, values[col]) for col, key in main.SORT_KEYS.items() if col in values})
+        df.loc[df.index[0], list(values)] = list(values.values())
+        self.assertEqual(df.at[0, 'StartDate'], pd.Timestamp('2025-02-01'))
+        self.assertEqual(df.at[0, 'EndDate'], pd.Timestamp('2025-03-01'))
+        self.assertEqual(df.at[0, 'Age'], 39)
+
+
+if __name__ == '__main__':
+    unittest.main()